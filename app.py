@@ -3,10 +3,11 @@
 
 import streamlit as st
 import os
+import html
 from rag_pipeline import (
     process_uploaded_pdf,
-    answer_with_rag,
-    answer_without_rag,
+    stream_answer_with_rag,
+    answer_both,
     SUGGESTED_QUESTIONS
 )
 
@@ -32,7 +33,9 @@ st.markdown("""
         color: #666;
         margin-bottom: 2rem;
     }
-    .answer-box {
+    /* Answer boxes are Streamlit containers tagged with a marker span,
+       so the answer inside renders as normal (safe) markdown */
+    div[data-testid="stVerticalBlock"]:has(> div[data-testid="element-container"] .answer-box) {
         background-color: #f0f7ff;
         border-left: 4px solid #2E86AB;
         padding: 1.5rem;
@@ -47,7 +50,7 @@ st.markdown("""
         margin: 0.5rem 0;
         font-size: 0.85rem;
     }
-    .without-rag-box {
+    div[data-testid="stVerticalBlock"]:has(> div[data-testid="element-container"] .without-rag-box) {
         background-color: #fff5f5;
         border-left: 4px solid #e74c3c;
         padding: 1.5rem;
@@ -57,6 +60,25 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# Only the most recent Q&A pairs are kept in session state
+MAX_HISTORY = 20
+
+
+@st.cache_data(max_entries=256)
+def render_source(index: int, content: str, page: int) -> str:
+    """Source chunk as an escaped HTML card, built once per chunk."""
+    return (
+        f'<div class="source-box"><strong>Chunk {index + 1} — Page {page + 1}</strong>'
+        f'<br><br>{html.escape(content)}</div>'
+    )
+
+
+def answer_box(css_class: str):
+    """Container styled as an answer box; write markdown into it."""
+    box = st.container()
+    box.markdown(f'<span class="{css_class}"></span>', unsafe_allow_html=True)
+    return box
+
 
 # ── SIDEBAR ──
 with st.sidebar:
@@ -128,7 +150,7 @@ st.markdown("## Step 1 — Upload Your Resume")
 uploaded_file = st.file_uploader(
     "Upload your resume as a PDF",
     type=["pdf"],
-    help="Processed locally — chunked, embedded, stored in ChromaDB"
+    help="Processed locally — chunked, embedded, stored in memory"
 )
 
 if uploaded_file is not None:
@@ -157,7 +179,7 @@ if uploaded_file is not None:
         with col2:
             st.metric("Chunks Created", st.session_state.chunk_count)
         with col3:
-            st.metric("Vector DB", "ChromaDB")
+            st.metric("Vector Store", "In-memory NumPy")
 
         st.divider()
 
@@ -193,30 +215,44 @@ if uploaded_file is not None:
         # ── GENERATE ANSWER ──
         if ask_button and user_question:
 
-            with st.spinner("Searching resume and generating answer..."):
+            no_rag_answer = None
+            if show_comparison:
+                with st.spinner("Searching resume and generating answers..."):
+                    rag_result, no_rag_answer = answer_both(
+                        st.session_state.rag_chain,
+                        user_question
+                    )
+            else:
+                with st.spinner("Searching resume..."):
+                    sources, token_stream = stream_answer_with_rag(
+                        st.session_state.rag_chain,
+                        user_question
+                    )
 
-                rag_result = answer_with_rag(
-                    st.session_state.rag_chain,
-                    user_question
-                )
+                # Show tokens as they arrive, then clear - the answer
+                # section below renders the finished answer
+                stream_box = st.empty()
+                with stream_box.container():
+                    with answer_box("answer-box"):
+                        answer = st.write_stream(token_stream)
+                stream_box.empty()
 
-                no_rag_answer = None
-                if show_comparison:
-                    no_rag_answer = answer_without_rag(user_question)
+                rag_result = {"answer": answer, "sources": sources}
 
-                st.session_state.current_answer = {
-                    "question": user_question,
-                    "rag_answer": rag_result["answer"],
-                    "sources": rag_result["sources"],
-                    "no_rag_answer": no_rag_answer
-                }
+            st.session_state.current_answer = {
+                "question": user_question,
+                "rag_answer": rag_result["answer"],
+                "sources": rag_result["sources"],
+                "no_rag_answer": no_rag_answer
+            }
 
-                st.session_state.qa_history.append({
-                    "question": user_question,
-                    "answer": rag_result["answer"]
-                })
+            st.session_state.qa_history.append({
+                "question": user_question,
+                "answer": rag_result["answer"]
+            })
+            st.session_state.qa_history = st.session_state.qa_history[-MAX_HISTORY:]
 
-                st.session_state.current_question = ""
+            st.session_state.current_question = ""
 
         # ── DISPLAY ANSWER ──
         if st.session_state.current_answer:
@@ -234,26 +270,20 @@ if uploaded_file is not None:
                 with col_rag:
                     st.markdown("### ✅ With RAG")
                     st.markdown("*Grounded in your actual resume*")
-                    st.markdown(
-                        f'<div class="answer-box">{current["rag_answer"]}</div>',
-                        unsafe_allow_html=True
-                    )
+                    with answer_box("answer-box"):
+                        st.markdown(current["rag_answer"])
 
                 with col_no_rag:
                     st.markdown("### ❌ Without RAG")
                     st.markdown("*Raw LLM — no resume context*")
-                    st.markdown(
-                        f'<div class="without-rag-box">{current["no_rag_answer"]}</div>',
-                        unsafe_allow_html=True
-                    )
+                    with answer_box("without-rag-box"):
+                        st.markdown(current["no_rag_answer"])
 
                 st.info("👆 The RAG answer is specific to YOUR resume. The non-RAG answer is generic and could apply to anyone.")
 
             else:
-                st.markdown(
-                    f'<div class="answer-box">{current["rag_answer"]}</div>',
-                    unsafe_allow_html=True
-                )
+                with answer_box("answer-box"):
+                    st.markdown(current["rag_answer"])
 
             with st.expander(
                 f"📎 View {len(current['sources'])} Source Chunks Used"
@@ -261,11 +291,12 @@ if uploaded_file is not None:
                 st.markdown(
                     "*Exact parts of your resume used to generate this answer:*"
                 )
-                for i, source in enumerate(current["sources"]):
-                    st.markdown(
-                        f'<div class="source-box"><strong>Chunk {i+1} — Page {source["page"] + 1}</strong><br><br>{source["content"]}</div>',
-                        unsafe_allow_html=True
-                    )
+                # One element for all chunks instead of one per chunk
+                sources_html = "".join(
+                    render_source(i, source["content"], source["page"])
+                    for i, source in enumerate(current["sources"])
+                )
+                st.markdown(sources_html, unsafe_allow_html=True)
 
         # ── HISTORY ──
         if len(st.session_state.qa_history) > 1:
@@ -1,12 +1,25 @@
 import os
+import hashlib
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 from dotenv import load_dotenv
-from langchain_community.document_loaders import PyPDFLoader
+import pymupdf
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_openai import OpenAIEmbeddings, ChatOpenAI
-from langchain_community.vectorstores import Chroma
+from langchain_community.vectorstores.utils import maximal_marginal_relevance
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.pydantic_v1 import Field
+from langchain_core.retrievers import BaseRetriever
 from langchain.chains import RetrievalQA
 from langchain.prompts import PromptTemplate
+import streamlit as st
+import shutil
 import tempfile
+from pathlib import Path
 
 # Load environment variables from .env file
 load_dotenv()
@@ -15,8 +28,120 @@ load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 CHUNK_SIZE = 500
 CHUNK_OVERLAP = 50
-COLLECTION_NAME = "resume_collection"
-CHROMA_PERSIST_DIR = "./chroma_db"
+VECTOR_STORE_DIR = "./vector_store"
+EMBEDDING_MODEL = "text-embedding-3-small"
+EMBEDDING_DIMENSIONS = 512
+# Stores are tagged with the embedding setup so vectors from a
+# different model or size are never mixed into the same store
+EMBEDDING_TAG = "v3s512"
+EMBED_BATCH_SIZE = 2048  # max inputs the OpenAI embeddings endpoint accepts per request
+SEMANTIC_CACHE_THRESHOLD = 0.97  # cosine similarity above which a past answer is reused
+SEMANTIC_CACHE_SIZE = 128
+QUERY_VECTOR_CACHE_SIZE = 256  # question embeddings remembered per resume
+RETRIEVAL_K = 4  # chunks handed to the LLM per question
+RETRIEVAL_FETCH_K = 20  # nearest candidates MMR picks from
+# Chunk vectors are kept at half precision - plenty for ranking a
+# few hundred unit vectors, at half the memory and bandwidth
+VECTOR_DTYPE = np.float16
+# Near-duplicate rule: SimHashes at most this many bits apart. Kept tight
+# because chunks differing by one word (employer, date) can land within a
+# few bits, and a wrongly dropped chunk can never be retrieved
+NEAR_DUPLICATE_BITS = 1
+# Short chunks (titles, dated role lines) are only deduplicated exactly
+NEAR_DUPLICATE_MIN_WORDS = 20
+
+@st.cache_resource
+def get_embeddings() -> OpenAIEmbeddings:
+    """
+    Shared OpenAI embeddings client.
+
+    Streamlit reruns the whole script on every interaction, so the
+    client is cached once per process instead of rebuilt each call.
+    """
+    return OpenAIEmbeddings(
+        openai_api_key=OPENAI_API_KEY,
+        model=EMBEDDING_MODEL,
+        dimensions=EMBEDDING_DIMENSIONS,
+        chunk_size=EMBED_BATCH_SIZE
+    )
+
+@st.cache_resource
+def get_llm(temperature: float = 0) -> ChatOpenAI:
+    """
+    Shared chat model, cached per temperature."""
+    return ChatOpenAI(
+        openai_api_key=OPENAI_API_KEY,
+        model="gpt-3.5-turbo",
+        temperature=temperature
+    )
+
+# Built once at import rather than on every upload
+_SPLITTER = RecursiveCharacterTextSplitter(
+    chunk_size=CHUNK_SIZE,
+    chunk_overlap=CHUNK_OVERLAP,
+    length_function=len,
+    separators=["\n\n", "\n", " ", ""],
+    is_separator_regex=False
+)
+
+def _unit(vector) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+def _unit_rows(vectors) -> np.ndarray:
+    """
+    L2-normalize each row in float32, then store as VECTOR_DTYPE."""
+    mat = np.asarray(vectors, dtype=np.float32)
+    if len(mat):
+        mat /= np.linalg.norm(mat, axis=1, keepdims=True)
+    return mat.astype(VECTOR_DTYPE)
+
+def _simhash(text: str) -> int:
+    """
+    64-bit SimHash over word 3-grams - similar texts get hashes
+    that differ in only a few bits."""
+    words = text.lower().split()
+    shingles = [" ".join(words[i:i + 3]) for i in range(max(len(words) - 2, 1))]
+
+    weights = [0] * 64
+    for shingle in shingles:
+        h = int.from_bytes(
+            hashlib.blake2b(shingle.encode(), digest_size=8).digest(), "big"
+        )
+        for bit in range(64):
+            weights[bit] += 1 if h >> bit & 1 else -1
+
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+def _dedupe_chunks(chunks: list) -> list:
+    """
+    Drop exact and near-duplicate chunks, keeping the first of each.
+
+    Repeated header lines and overlap-heavy splits would otherwise
+    each cost an embedding and a row in the retrieval matrix.
+    """
+    seen = set()
+    kept_simhashes = []
+    kept = []
+
+    for chunk in chunks:
+        normalized = chunk.page_content.strip().lower()
+        digest = hashlib.blake2b(normalized.encode(), digest_size=8).digest()
+        if digest in seen:
+            continue
+        seen.add(digest)
+
+        if len(normalized.split()) >= NEAR_DUPLICATE_MIN_WORDS:
+            simhash = _simhash(normalized)
+            if any((simhash ^ other).bit_count() <= NEAR_DUPLICATE_BITS
+                   for other in kept_simhashes):
+                print(f"Dropping near-duplicate chunk: {normalized[:60]!r}")
+                continue
+            kept_simhashes.append(simhash)
+
+        kept.append(chunk)
+
+    return kept
 
 def load_and_chunk_pdf(pdf_path: str) -> list:
     """
@@ -30,82 +155,182 @@ def load_and_chunk_pdf(pdf_path: str) -> list:
     print(f"Loading PDF: {pdf_path}")
 
     # Load PDF - extracts text page by page
-    loader = PyPDFLoader(pdf_path)
-    pages = loader.load()
+    # PyMuPDF parses in C, several times faster than pure-Python pypdf
+    with pymupdf.open(pdf_path) as doc:
+        pages = [
+            Document(
+                page_content=page.get_text("text"),
+                metadata={"source": pdf_path, "page": i}
+            )
+            for i, page in enumerate(doc)
+        ]
 
     print(f"Pages loaded: {len(pages)}")
 
     # Split into chunks
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=CHUNK_SIZE,
-        chunk_overlap=CHUNK_OVERLAP,
-        length_function=len,
-        separators=["\n\n", "\n", " ", ""]
-    )
-
-    chunks = text_splitter.split_documents(pages)
+    chunks = _SPLITTER.split_documents(pages)
     print(f"Chunks created: {len(chunks)}")
 
+    # Drop repeats before they reach the embedding API
+    chunks = _dedupe_chunks(chunks)
+    print(f"Chunks after removing duplicates: {len(chunks)}")
+
     return chunks
 
-def create_vector_store(chunks: list) -> Chroma:
+_QUERY_VECTORS_LOCK = threading.Lock()
+
+class NumpyMMRRetriever(BaseRetriever):
+    """
+    Retriever over an in-memory float16 matrix of unit-normalized chunk vectors.
+
+    A resume is a few hundred chunks at most, so scoring every chunk
+    is one matrix-vector product - no database read per question.
+    The top fetch_k candidates are then re-ranked with MMR so the k
+    chunks sent to the LLM aren't near-duplicates of each other.
+    """
+
+    embeddings: Embeddings
+    mat: np.ndarray
+    docs: list
+    k: int = RETRIEVAL_K
+    fetch_k: int = RETRIEVAL_FETCH_K
+    lambda_mult: float = 0.5
+    # Unit vectors of questions already seen (or prewarmed), so each
+    # distinct question is embedded at most once
+    query_vectors: dict = Field(default_factory=dict)
+    # Recent (unit query vector, answer) pairs for this resume - kept on
+    # the retriever so answers about one resume are never served for
+    # another. Oldest entries fall off once the deque is full.
+    answer_cache: deque = Field(
+        default_factory=lambda: deque(maxlen=SEMANTIC_CACHE_SIZE)
+    )
+
+    def _remember(self, query: str, q_vec: np.ndarray) -> np.ndarray:
+        # The retriever is shared by every session through the chain cache
+        with _QUERY_VECTORS_LOCK:
+            if len(self.query_vectors) >= QUERY_VECTOR_CACHE_SIZE:
+                self.query_vectors.pop(next(iter(self.query_vectors)), None)
+            self.query_vectors[query] = q_vec
+        return q_vec
+
+    def embed_question(self, query: str) -> np.ndarray:
+        q_vec = self.query_vectors.get(query)
+        if q_vec is None:
+            q_vec = self._remember(query, _unit(self.embeddings.embed_query(query)))
+        return q_vec
+
+    def prewarm(self, questions: list) -> None:
+        """
+        Embed questions likely to be asked in one batched request."""
+        missing = [q for q in questions if q not in self.query_vectors]
+        if missing:
+            for query, vector in zip(missing, self.embeddings.embed_documents(missing)):
+                self._remember(query, _unit(vector))
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> list:
+        if not self.docs:
+            return []
+
+        q_vec = self.embed_question(query)
+        # float16 matrix upcasts to float32 for the product
+        scores = self.mat @ q_vec
+
+        fetch_k = min(self.fetch_k, len(self.docs))
+        candidates = np.argpartition(scores, -fetch_k)[-fetch_k:]
+
+        picked = maximal_marginal_relevance(
+            q_vec,
+            self.mat[candidates].astype(np.float32),
+            lambda_mult=self.lambda_mult,
+            k=min(self.k, fetch_k)
+        )
+        return [self.docs[candidates[i]] for i in picked]
+
+def _store_path(store_name: str) -> str:
+    return os.path.join(VECTOR_STORE_DIR, f"{store_name}.npz")
+
+def create_vector_store(chunks: list, store_name: str) -> NumpyMMRRetriever:
     """
-    Convert chunks to embeddingd and store in ChromaDB.
+    Convert chunks to embeddingd and keep them in an in-memory retriever.
     
     Why embeddingd?
     - Embeddingd convert text to vectors (lists of numbers)
     - Similar meaning = similar vectors = close in vector spacce
     - Enable semantic search - finds meaning, not just keywords
     
-    Why ChromaDB?
-    - Local vector database - no external service needed
-    - Persists to disk so you don't re-embed on every run
-    - Fast similarity search
+    Why no vector database?
+    - A resume is only 20-80 chunks - a NumPy matrix searches that instantly
+    - Nothing to start up, no external service, no per-query disk reads
+    - Each resume is saved to one small .npz file so you don't re-embed on every run
+
+    Each resume gets its own store (named from its content hash),
+    so different resumes never mix. Reopening a saved store is done
+    by load_existing_vector_store, without a single embedding call.
     """
-
-    print("Creating embeddingd and storing in ChromaDB...")
-
-    # OpenAI embeddingd - converts text to 1536-dimensional vectors
-    embeddings = OpenAIEmbeddings(
-        openai_api_key=OPENAI_API_KEY,
-        model="text-embedding-ada-002"
-    )
-
-    # Create vector store from chunks
-    vector_store = Chroma.from_documents(
-        documents=chunks,
-        embedding=embeddings,
-        collection_name=COLLECTION_NAME,
-        persist_directory=CHROMA_PERSIST_DIR
-    )
+    print("Creating embeddingd...")
+
+    # OpenAI embeddingd - converts text to 512-dimensional vectors
+    embeddings = get_embeddings()
+
+    # Embed every chunk in one request - a resume is far below the
+    # batch limit, so this saves an HTTP round trip per small group
+    texts = [chunk.page_content for chunk in chunks]
+    pages = [chunk.metadata.get("page", 0) for chunk in chunks]
+    mat = _unit_rows(embeddings.embed_documents(texts))
+
+    # Write to a .part file then rename, so a crash mid-write never
+    # leaves a partial store that looks reusable
+    os.makedirs(VECTOR_STORE_DIR, exist_ok=True)
+    with tempfile.NamedTemporaryFile(
+        dir=VECTOR_STORE_DIR, suffix=".part", delete=False
+    ) as tmp_file:
+        try:
+            np.savez(
+                tmp_file,
+                mat=mat,
+                texts=np.array(texts, dtype=str),
+                pages=np.array(pages, dtype=np.int32)
+            )
+        except Exception:
+            tmp_file.close()
+            os.unlink(tmp_file.name)
+            raise
+    try:
+        os.replace(tmp_file.name, _store_path(store_name))
+    except Exception:
+        os.unlink(tmp_file.name)
+        raise
+
+    docs = [
+        Document(page_content=text, metadata={"page": page})
+        for text, page in zip(texts, pages)
+    ]
 
     print(f"Vector store created with {len(chunks)} chunks")
-    return vector_store
+    return NumpyMMRRetriever(embeddings=embeddings, mat=mat, docs=docs)
 
-def load_existing_vector_store() -> Chroma:
+def load_existing_vector_store(store_name: str) -> NumpyMMRRetriever:
     """
-    Load an already-creataed vector store from disk."""
-    embeddingd = OpenAIEmbeddings(
-        openai_api_key=OPENAI_API_KEY,
-        model="text-embedding-ada-002"
-    )
-
-    vectore_store = Chroma(
-        collection_name=COLLECTION_NAME,
-        embedding_function=embeddings,
-        persist_directory=CHROMA_PERSIST_DIR
-    )
+    Load an already-created vector store from disk."""
+    with np.load(_store_path(store_name), allow_pickle=False) as data:
+        mat = data["mat"].astype(VECTOR_DTYPE)
+        docs = [
+            Document(page_content=str(text), metadata={"page": int(page)})
+            for text, page in zip(data["texts"], data["pages"])
+        ]
 
-    return vectore_store
+    return NumpyMMRRetriever(embeddings=get_embeddings(), mat=mat, docs=docs)
 
-def build_rag_chain(vector_store: Chroma) -> RetrievalQA:
+def build_rag_chain(retriever: BaseRetriever) -> RetrievalQA:
     """
     Build the RAG chain connecting retrieval to generation.
     
     How RAG works:
     1. User asks a question
     2. Question gets embedded into a vector
-    3. ChromaDB finds the 4 most similar chunks (retrieval)
+    3. The 20 most similar chunks are found, and MMR keeps 4 diverse ones (retrieval)
     4. Retrived chunks + question get sent to LLM (augmented generation)
     5. LLM generates answer grounded in retrieved content
     
@@ -116,11 +341,7 @@ def build_rag_chain(vector_store: Chroma) -> RetrievalQA:
     """
 
     # The LLM that generates final answers
-    llm = ChatOpenAI(
-        openai_api_key=OPENAI_API_KEY,
-        model="gpt-3.5-turbo",
-        temperature=0
-    )
+    llm = get_llm(temperature=0)
 
     # Custom prompt that keeps the LLM grounded
     prompt_template = """You are an expert career coach and resume analyst.
@@ -145,31 +366,28 @@ def build_rag_chain(vector_store: Chroma) -> RetrievalQA:
     )
 
     # Build the chain
-    # k=4 means retrieve 4 most relevant chunks per question
+    # Each question is scored against every chunk with NumPy and
+    # MMR-reranked down to RETRIEVAL_K chunks
     rag_chain = RetrievalQA.from_chain_type(
         llm=llm,
         chain_type="stuff",
-        retriever=vector_store.as_retriever(
-            search_type="similarity",
-            search_kwargs={"k": 4}
-        ),
+        retriever=retriever,
         chain_type_kwargs={"prompt": PROMPT},
         return_source_documents=True
     )
 
     return rag_chain
 
-def answer_with_rag(rag_chain: RetrievalQA, question: str) -> dict:
-    """
-    Answer a question using RAG.
-    Returns the answer and the source chunks used.
+def _format_rag_result(result: dict) -> dict:
     """
-    result = rag_chain.invoke({"query": question})
-
-    answer = result["result"]
-    source_docs = result["source_documents"]
+    Shape a RetrievalQA result into the answer + sources dict the UI uses."""
+    return {
+        "answer": result["result"],
+        "sources": _format_sources(result["source_documents"])
+    }
 
-    sources = [
+def _format_sources(source_docs: list) -> list:
+    return [
         {
             "content": doc.page_content,
             "page": doc.metadata.get("page", 0)
@@ -177,54 +395,210 @@ def answer_with_rag(rag_chain: RetrievalQA, question: str) -> dict:
         for doc in source_docs
     ]
 
-    return {
-        "answer": answer,
-        "sources": sources
-    }
+def _no_rag_prompt(question: str) -> str:
+    return f"""Answer this question about a resume: {question}
+
+    Note: You don't have access to the actual resume content.
+    Answer as best you can based on general knowledge only."""
+
+def _semantic_cache_lookup(rag_chain: RetrievalQA, q_vec: np.ndarray):
+    """
+    Return a cached answer for a near-identical past question, or None."""
+    entries = list(rag_chain.retriever.answer_cache)
+    if not entries:
+        return None
+
+    scores = np.stack([vec for vec, _ in entries]) @ q_vec
+    best = int(np.argmax(scores))
+    if scores[best] >= SEMANTIC_CACHE_THRESHOLD:
+        return entries[best][1]
+    return None
+
+def _semantic_cache_store(rag_chain: RetrievalQA, q_vec: np.ndarray, answer: dict):
+    rag_chain.retriever.answer_cache.append((q_vec, answer))
+
+def answer_with_rag(rag_chain: RetrievalQA, question: str) -> dict:
+    """
+    Answer a question using RAG.
+    Returns the answer and the source chunks used.
+
+    Questions that are near-identical to one already asked about
+    this resume are answered from the semantic cache, skipping
+    retrieval and generation.
+    """
+    q_vec = rag_chain.retriever.embed_question(question)
+    cached = _semantic_cache_lookup(rag_chain, q_vec)
+    if cached is not None:
+        return cached
+
+    result = _format_rag_result(rag_chain.invoke({"query": question}))
+    _semantic_cache_store(rag_chain, q_vec, result)
+    return result
 
-def answer_without_rag(question: str) -> str:
+def stream_answer_with_rag(rag_chain: RetrievalQA, question: str) -> tuple:
+    """
+    Answer a question using RAG, streaming the answer token by token.
+
+    Retrieval runs up front, so the sources are known immediately.
+    Returns (sources, token_stream) - token_stream yields pieces of
+    the answer (for st.write_stream) and caches the full answer once
+    it has been consumed. Cache hits yield the whole answer at once.
+    """
+    q_vec = rag_chain.retriever.embed_question(question)
+    cached = _semantic_cache_lookup(rag_chain, q_vec)
+    if cached is not None:
+        return cached["sources"], iter([cached["answer"]])
+
+    # Build the prompt and pick the model exactly as the chain would,
+    # so streamed and non-streamed answers can't drift apart.
+    # Relies on langchain==0.1.20 internals: StuffDocumentsChain._get_inputs
+    # and LLMChain.prep_prompts are the calls RetrievalQA.invoke makes
+    stuff_chain = rag_chain.combine_documents_chain
+    source_docs = rag_chain.retriever.invoke(question)
+    inputs = stuff_chain._get_inputs(source_docs, question=question)
+    prompt = stuff_chain.llm_chain.prep_prompts([inputs])[0][0].to_string()
+    llm = stuff_chain.llm_chain.llm
+
+    # Fail loudly if an upgrade changes how the chain assembles its prompt
+    if question not in prompt or not all(doc.page_content in prompt for doc in source_docs):
+        raise RuntimeError("Streaming prompt no longer matches RetrievalQA's prompt")
+    sources = _format_sources(source_docs)
+
+    def token_stream():
+        pieces = []
+        for chunk in llm.stream(prompt):
+            pieces.append(chunk.content)
+            yield chunk.content
+
+        _semantic_cache_store(
+            rag_chain, q_vec, {"answer": "".join(pieces), "sources": sources}
+        )
+
+    return sources, token_stream()
+
+def answer_without_rag(question: str, llm: ChatOpenAI = None) -> str:
     """
     Answer the same question WITHOUT RAG - just raw LLM.
     Used to demonstrate the difference RAG makes.
     The answer will be vague because the LLM has no resume contect.
+    Pass llm when calling off the script thread (see answer_both).
     """
+    if llm is None:
+        llm = get_llm(temperature=0)
 
-    llm = ChatOpenAI(
-        openai_api_key=OPENAI_API_KEY,
-        model="gpt-3.5-turbo",
-        temperature=0
-    )
+    prompt = _no_rag_prompt(question)
 
-    prompt = f"""Answer this question about a resume: {question}
+    # Chat models return an AIMessage, not a string
+    response = llm.invoke(prompt)
+    return response.content.strip()
 
-    Note: You don't have access to the actual resume content.
-    Answer as best you can based on general knowledge only."""
+def answer_both(rag_chain: RetrievalQA, question: str) -> tuple:
+    """
+    Answer with and without RAG at the same time.
 
-    response = llm.invoke(prompt)
-    return response.strip()
+    The two LLM calls are independent and network-bound, so running
+    them in parallel threads costs roughly one round trip instead of
+    two. Threads rather than asyncio: the shared cached clients must
+    not be reused across short-lived event loops.
+    Returns (rag_result, no_rag_answer).
+    """
+    # Resolve the cached model here: st.cache_resource lookups on a
+    # worker thread have no ScriptRunContext and log warnings
+    llm = get_llm(temperature=0)
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        rag_future = pool.submit(answer_with_rag, rag_chain, question)
+        no_rag_future = pool.submit(answer_without_rag, question, llm)
+        return rag_future.result(), no_rag_future.result()
+
+# Upload copy buffer - bounds peak memory regardless of PDF size
+UPLOAD_BUFFER_SIZE = 1 << 16
+# Uploaded PDFs are kept here under their content hash, so the same
+# resume is only ever written to disk once
+PDF_CACHE_DIR = Path(tempfile.gettempdir()) / "resume_cache"
+
+@st.cache_resource(show_spinner=False)
+def _build_chain_from_file(pdf_hash: str, _pdf_path: str) -> tuple:
+    """
+    Build the RAG chain for one resume, cached by PDF content hash.
+
+    Re-uploading the same resume (or a new session uploading it)
+    returns the warm chain without re-parsing or re-embedding.
+    Each resume gets its own vector store file, so embeddings
+    already on disk are reused across restarts.
+    The leading underscore keeps the file path out of the cache key.
+    """
+    store_name = f"resume_{pdf_hash[:12]}_{EMBEDDING_TAG}"
+
+    # A saved store already holds the chunks - skip parsing the PDF
+    if os.path.exists(_store_path(store_name)):
+        print(f"Reusing existing vector store: {store_name}")
+        retriever = load_existing_vector_store(store_name)
+    else:
+        chunks = load_and_chunk_pdf(_pdf_path)
+        retriever = create_vector_store(chunks, store_name=store_name)
+
+    # Suggested questions are fixed - embed them all now in one request
+    # so clicking one skips straight to generation. Optional, so a
+    # failure here must not fail the upload
+    try:
+        retriever.prewarm(SUGGESTED_QUESTIONS)
+    except Exception as e:
+        print(f"Skipping suggested-question prewarm: {e}")
+
+    rag_chain = build_rag_chain(retriever)
+
+    return rag_chain, len(retriever.docs)
+
+def _cache_uploaded_pdf(uploaded_file) -> tuple:
+    """
+    Hash an upload and make sure it exists at its per-hash cache path.
+    Returns (pdf_hash, pdf_path). A file already in the cache is not
+    rewritten; new files are written to a .part file then renamed, so
+    a half-written PDF is never mistaken for a cached one.
+    """
+    hasher = hashlib.sha256()
+    uploaded_file.seek(0)
+    for block in iter(lambda: uploaded_file.read(UPLOAD_BUFFER_SIZE), b""):
+        hasher.update(block)
+    pdf_hash = hasher.hexdigest()
+
+    pdf_path = PDF_CACHE_DIR / f"{pdf_hash}.pdf"
+    if not pdf_path.exists():
+        PDF_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        uploaded_file.seek(0)
+        with tempfile.NamedTemporaryFile(
+            dir=PDF_CACHE_DIR, suffix=".part", delete=False
+        ) as tmp_file:
+            try:
+                shutil.copyfileobj(uploaded_file, tmp_file, UPLOAD_BUFFER_SIZE)
+            except Exception:
+                tmp_file.close()
+                os.unlink(tmp_file.name)
+                raise
+        try:
+            os.replace(tmp_file.name, pdf_path)
+        except Exception:
+            os.unlink(tmp_file.name)
+            raise
+
+    return pdf_hash, str(pdf_path)
 
 def process_uploaded_pdf(uploaded_file) -> tuple:
     """
     Handle a PDF uploaded through Streamlit.
-    Saves to temp file, processes, returns chain and status.
+    Stores it under its content hash, builds or reuses the chain
+    for it, returns chain and status.
     """
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
-        tmp_file.write(uploaded_file.getvalue())
-        tmp_path = tmp_file.name
-
     try:
-        chunks = load_and_chunk_pdf(tmp_path)
-        vector_store = create_vector_store(chunks)
-        rag_chain = build_rag_chain(vector_store)
+        pdf_hash, pdf_path = _cache_uploaded_pdf(uploaded_file)
+        rag_chain, chunk_count = _build_chain_from_file(pdf_hash, pdf_path)
 
-        return rag_chain, len(chunks), True, "Resume processed successfully!"
+        return rag_chain, chunk_count, True, "Resume processed successfully!"
 
     except Exception as e:
         return None, 0, False, f"Error processing PDF: {str(e)}"
 
-    finally:
-        os.unlink(tmp_path)
-
 # ── SUGGESTED QUESTIONS ──
 SUGGESTED_QUESTIONS = [
     "What are my strongest technical skills?",